@@ -1,5 +1,8 @@
 import scrapy
-import json
+import ijson
+import orjson
+import pyarrow.compute as pc
+from pyarrow import feather
 from datetime import datetime
 from scrapy import signals
 from tqdm import tqdm
@@ -7,31 +10,60 @@ import re
 import os
 
 FILE_PATH = 'dataset/vp_discours.json'
+INDEX_PATH = 'dataset/vp_discours.feather' # Written by src/prepare_index.py
 
 ## Valid Date range: 1959-01-15 to 2025-12-22
 BEGIN_DATE_STR = "2000-01-01"
 END_DATE_STR = "2010-12-31" 
+PBAR_BATCH = 50 # Number of finished items per progress bar refresh
 FAILURE_FILE = f'logs/failures_{BEGIN_DATE_STR}_to_{END_DATE_STR}.jsonl'
 
+# Dates are ISO "YYYY-MM-DD", so plain string comparison orders them correctly.
+# ASCII digits only, checked with fullmatch so a trailing newline is rejected like strptime did
+_DATE_RE = re.compile(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}$')
+
+# Trailing "source: ..." line of a speech, matched case insensitively
+# ^         -> Start of the string
+# \(?       -> Optional opening parenthesis "("
+# \s*       -> Optional whitespace
+# source    -> The literal word "source"
+# \s*       -> Optional whitespace before separator
+# [:.：]?     -> Optional separator: colon ":" or dot "."
+# \s*       -> Optional whitespace after separator
+# (.*)      -> Capture everything else as the content
+_SOURCE_RE = re.compile(r"^\(?\s*source\s*[:.：]?\s*(.*)", re.IGNORECASE)
+
+# Text nodes of the transcript container, same class test as the CSS selector
+# 'div.field--name-field-texte-integral' but collected in a single query
+_TEXT_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' field--name-field-texte-integral ')]//text()"
+
 if not os.path.exists('logs'):
     os.makedirs('logs')
 
-def filter_by_date_range(data_list, begin_date_str, end_date_str):
-    begin_date = datetime.strptime(begin_date_str, "%Y-%m-%d")
-    end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-    
-    filtered_list = []
-    for entry in data_list:
-        date_str = entry.get("prononciation")
-        if not date_str: # Skip if date is missing
-            continue
-        try:
-            current_date = datetime.strptime(date_str, "%Y-%m-%d")
-            if begin_date <= current_date <= end_date:
-                filtered_list.append(entry)
-        except ValueError: # Skip if date format is wrong
-            continue
-    return filtered_list
+def in_date_range(date_str):
+    if not isinstance(date_str, str) or not _DATE_RE.fullmatch(date_str): # Skip if date is missing or malformed
+        return False
+    return BEGIN_DATE_STR <= date_str <= END_DATE_STR
+
+
+def load_indexed_entries():
+    # Memory-map the Feather index and filter the date column in one vectorized pass
+    table = feather.read_table(INDEX_PATH, memory_map=True)
+    dates = table.column('prononciation')
+    mask = pc.and_(
+        pc.match_substring_regex(dates, _DATE_RE.pattern),
+        pc.and_(pc.greater_equal(dates, BEGIN_DATE_STR), pc.less_equal(dates, END_DATE_STR)),
+    )
+    # Rebuild each entry from its raw JSON so it matches the streamed record exactly
+    return [orjson.loads(record) for record in table.filter(mask).column('record').to_pylist()]
+
+
+def stream_entries():
+    # Stream the records so requests start firing as soon as the first match is seen
+    with open(FILE_PATH, 'rb') as f:
+        for entry in ijson.items(f, 'item', use_float=True):
+            if in_date_range(entry.get("prononciation")):
+                yield entry
 
 
 class SpeechSpider(scrapy.Spider):
@@ -43,7 +75,22 @@ class SpeechSpider(scrapy.Spider):
         'LOG_FILE_APPEND': False, 
         'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'CONCURRENT_REQUESTS': 32,
-        'DOWNLOAD_DELAY': 0.2,
+        # Every URL lives on vie-publique.fr, so they all share one download slot.
+        # This bounds requests in flight (and the persistent HTTP/1.1 connections per host)
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 16,
+        # Politeness floor and the effective rate limit: the slot releases at most one
+        # request per delay, so 0.1s caps the crawl at ~10 req/s regardless of concurrency
+        'DOWNLOAD_DELAY': 0.1,
+        # AutoThrottle aims for latency / TARGET_CONCURRENCY as the delay, never below
+        # DOWNLOAD_DELAY, so it only slows the crawl once latency exceeds ~1.6s (slow or
+        # non-200 responses keep it from dropping); 429/5xx are only retried by RetryMiddleware
+        'AUTOTHROTTLE_ENABLED': True,
+        'AUTOTHROTTLE_START_DELAY': 0.2,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 16,
+        'DOWNLOAD_HANDLERS': {
+            'http': 'scrapy.core.downloader.handlers.http11.HTTP11DownloadHandler',
+            'https': 'scrapy.core.downloader.handlers.http11.HTTP11DownloadHandler',
+        },
         'RETRY_ENABLED': True,
         'RETRY_TIMES': 5,
         'RETRY_HTTP_CODES': [500, 502, 503, 504, 522, 524, 408, 429],
@@ -62,6 +109,9 @@ class SpeechSpider(scrapy.Spider):
     def from_crawler(cls, crawler, *args, **kwargs):
         spider = super(SpeechSpider, cls).from_crawler(crawler, *args, **kwargs)
 
+        # Keep the failure log open for the whole crawl instead of reopening it per failure
+        spider._failure_fh = open(FAILURE_FILE, 'ab', buffering=1 << 16)
+
         # Connect the item_scraped signal to our progress bar update function
         crawler.signals.connect(spider.item_scraped, signal=signals.item_scraped)
         crawler.signals.connect(spider.spider_closed, signal=signals.spider_closed)
@@ -70,15 +120,28 @@ class SpeechSpider(scrapy.Spider):
     def start_requests(self):
         self.logger.warning("LOGGER TEST: If you see this, writing to file is working!")
 
-        with open(FILE_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        target_data = filter_by_date_range(data, BEGIN_DATE_STR, END_DATE_STR)
+        # The index is usable on its own, or when it is at least as new as the JSON it was built from
+        index_fresh = os.path.exists(INDEX_PATH) and (
+            not os.path.exists(FILE_PATH) or os.path.getmtime(INDEX_PATH) >= os.path.getmtime(FILE_PATH)
+        )
+        if os.path.exists(INDEX_PATH) and not index_fresh:
+            self.logger.warning(f"INDEX CHECK: {INDEX_PATH} is older than {FILE_PATH}, streaming the JSON instead. Re-run src/prepare_index.py to refresh it.")
+
+        if index_fresh:
+            target_data = load_indexed_entries()
+            total = len(target_data)
+        else:
+            # Cheap first pass over the dates only, so the progress bar gets a total
+            # without materializing the whole metadata file in memory
+            with open(FILE_PATH, 'rb') as f:
+                total = sum(1 for date_str in ijson.items(f, 'item.prononciation') if in_date_range(date_str))
+            target_data = stream_entries()
         
-        self.logger.warning(f"DATA CHECK: Found {len(target_data)} items to scrape.")
+        self.logger.warning(f"DATA CHECK: Found {total} items to scrape.")
 
         # Initialize the progress bar with the total count of filtered items
-        self.pbar = tqdm(total=len(target_data), desc="Scraping Speeches", unit="item")
+        self.pbar = tqdm(total=total, desc="Scraping Speeches", unit="item", mininterval=0.5, smoothing=0.05)
+        self._done = 0
         
         for entry in target_data:
             yield scrapy.Request(
@@ -91,10 +154,9 @@ class SpeechSpider(scrapy.Spider):
     def parse(self, response):
         item = response.meta['original_data']
         
-        container = response.css('div.field--name-field-texte-integral')
-        clean_fragments = []
+        raw_fragments = response.xpath(_TEXT_XPATH).getall()
 
-        if not container:
+        if not raw_fragments:
             self.logger.warning(f"Empty content for {response.url}. Retrying...")
             
             retries = response.meta.get('retry_count', 0) + 1
@@ -109,28 +171,16 @@ class SpeechSpider(scrapy.Spider):
                 # --- NEW CODE START ---
                 self.log_failure(response.url, "Empty Content (Selector Failed)", response.meta['original_data'])
                 # --- NEW CODE END ---
-                self.pbar.update(1)
+                self.advance_pbar()
                 return
             
-        if container:
-            raw_fragments = container.css('::text').getall()
-            clean_fragments = [frag.strip() for frag in raw_fragments if frag.strip()]
+        clean_fragments = [text for frag in raw_fragments if (text := frag.strip())]
         
         source_text = None 
         
         if clean_fragments:
             last_fragment = clean_fragments[-1]
-            
-            # (?i)      -> Case insensitive (matches "Source", "source", "SOURCE")
-            # ^         -> Start of the string
-            # \(?       -> Optional opening parenthesis "("
-            # \s*       -> Optional whitespace
-            # source    -> The literal word "source"
-            # \s*       -> Optional whitespace before separator
-            # [:.：]?     -> Optional separator: colon ":" or dot "."
-            # \s*       -> Optional whitespace after separator
-            # (.*)      -> Capture everything else as the content
-            match = re.search(r"(?i)^\(?\s*source\s*[:.：]?\s*(.*)", last_fragment)
+            match = _SOURCE_RE.match(last_fragment)
             
             if match:
                 raw_source = match.group(1)
@@ -145,21 +195,28 @@ class SpeechSpider(scrapy.Spider):
     
     def item_scraped(self, item, response, spider):
         # Update the progress bar for every successful item
-        self.pbar.update(1) 
+        self.advance_pbar()
+
+    def advance_pbar(self):
+        # Count every finished item but only refresh the bar once per batch
+        self._done += 1
+        if self._done % PBAR_BATCH == 0:
+            self.pbar.update(PBAR_BATCH)
 
     def spider_closed(self, spider):
-        # Clean up the progress bar when finished
+        # Flush the remaining count and clean up the progress bar when finished
+        self.pbar.update(self._done % PBAR_BATCH)
         self.pbar.close() 
+        self._failure_fh.close()
     
     def log_failure(self, url, reason, original_data):
         failure_record = {
             "url": url,
             "reason": reason,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(), # orjson serializes datetimes as ISO 8601
             "original_data": original_data # Keep this so you can easily retry these later
         }
-        with open(FAILURE_FILE, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(failure_record, ensure_ascii=False) + "\n")
+        self._failure_fh.write(orjson.dumps(failure_record) + b"\n")
 
     def handle_error(self, failure):
         request = failure.request
@@ -172,7 +229,7 @@ class SpeechSpider(scrapy.Spider):
             new_request.dont_filter = True
             yield new_request
         else:
-            self.pbar.update(1) 
+            self.advance_pbar()
             self.logger.error(f"Failed completely: {repr(failure)}")
             
             # Extract the original data from the request meta if available
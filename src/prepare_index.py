@@ -0,0 +1,36 @@
+import json
+import orjson
+import pyarrow as pa
+from pyarrow import feather
+
+FILE_PATH = 'dataset/vp_discours.json'
+INDEX_PATH = 'dataset/vp_discours.feather'
+
+# Only what the crawler needs to filter and rebuild each record; every column is a
+# plain string so mixed-type or all-null values in the metadata cannot break the schema
+INDEX_SCHEMA = pa.schema([
+    ('prononciation', pa.string()),
+    ('record', pa.string()), # Raw JSON of the original record, decoded as-is by the crawler
+])
+
+def as_str(value):
+    return value if isinstance(value, str) else None
+
+## One-shot conversion of the metadata file to Feather, so collect_speeches.py
+## can memory-map it instead of re-parsing the JSON on every run
+with open(FILE_PATH, 'r', encoding='utf-8') as f:
+    data = json.load(f)
+
+table = pa.table({
+    'prononciation': [as_str(entry.get('prononciation')) for entry in data],
+    'record': [orjson.dumps(entry).decode('utf-8') for entry in data],
+}, schema=INDEX_SCHEMA)
+# Uncompressed, so the crawler's memory map reads the columns in place (zero-copy)
+feather.write_feather(table, INDEX_PATH, compression='uncompressed')
+
+# Check that the crawler will get back exactly the records the JSON path would yield
+index = feather.read_table(INDEX_PATH, memory_map=True)
+if [orjson.loads(record) for record in index.column('record').to_pylist()] != data:
+    raise ValueError(f"{INDEX_PATH} does not round-trip the records of {FILE_PATH}")
+
+print(f"Wrote {table.num_rows} records to {INDEX_PATH}")